@@ -1,13 +1,24 @@
-import json
-import jsonschema
+import asyncio
+import functools
+import hashlib
+import fastjsonschema
+import orjson
 import re
+import tiktoken
 import time
 import logging
 import os
 import csv
+import queue
+import threading
+import shelve
+import sqlite3
 import argparse
+import httpx
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing, contextmanager
 from logging.handlers import RotatingFileHandler
-from urllib.parse import urljoin
+from urllib.parse import urldefrag, urljoin
 from datetime import datetime
 from selenium import webdriver
 from selenium.webdriver.chrome.service import Service
@@ -16,13 +27,193 @@ from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException, NoSuchElementException
-from bs4 import BeautifulSoup
-from openai import OpenAI
+from bs4 import BeautifulSoup, SoupStrainer
+from selectolax.lexbor import LexborHTMLParser
+from openai import (APIError, AsyncOpenAI, AuthenticationError, DefaultAsyncHttpxClient, NotFoundError,
+                    OpenAIError, PermissionDeniedError, RateLimitError)
+from aiolimiter import AsyncLimiter
 from colorama import init, Fore, Back, Style
 
 # Initialize colorama
 init(autoreset=True)
 
+# Characters of text kept from each additional link, to avoid overwhelming ChatGPT
+ADDITIONAL_CONTENT_CHARS = 10000
+
+# Heading of each additional link's text, which follows the job description in the content sent to OpenAI
+ADDITIONAL_CONTENT_PREFIX = "    Additional content from "
+
+# Headers sent with every plain HTTP request
+HTTP_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (compatible; CRAJobHarvester/0.1; +https://github.com/ZhangZhuoSJTU/CRAJobHarvester)"
+}
+
+# Transient HTTP statuses that are retried with exponential backoff, and how many times
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+HTTP_RETRIES = 3
+
+# Failure statuses worth trying again on a later run, so they are never cached
+TRANSIENT_STATUSES = RETRY_STATUSES | {408}
+
+# Content types parsed as HTML (other responses, such as PDFs, are skipped), and the most of a page read
+HTML_CONTENT_TYPES = {"text/html", "application/xhtml+xml", ""}
+MAX_PAGE_BYTES = 2 * 1024 * 1024
+
+# Runs of blank lines in job descriptions
+_BLANK_LINES_RE = re.compile(r'\n\s*\n')
+
+# Copyright notices and similar footer boilerplate, removed by strip_boilerplate
+_BOILERPLATE_RES = [
+    re.compile(r'(?:©|\(c\)|copyright)\s*(?:\d{4}\s*[-–]\s*)?\d{4}[^.]{0,100}\.?', re.IGNORECASE),
+    re.compile(r'all rights reserved\.?', re.IGNORECASE),
+]
+
+# Expected structure of the job details returned by OpenAI
+JOB_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "university_name": {"type": "string"},
+        "department": {"type": "string"},
+        "position": {"type": "string"},
+        "submission_deadline": {"type": "string"},
+        "hiring_areas": {"type": "array", "items": {"type": "string"}},
+        "recommendation_letters": {"type": ["string", "integer"]},
+        "positions_available": {"type": ["string", "integer"]},
+        "additional_comments": {"type": "string"}
+    },
+    "required": ["university_name", "department", "position", "submission_deadline", "hiring_areas", "recommendation_letters", "positions_available", "additional_comments"]
+}
+
+# Prompt heading, instruction and (if not a plain string) example answer for each field, in prompt order
+FIELD_PROMPTS = {
+    "university_name": ("University or company name", "Extract the full name", None),
+    "department": ("Department that is hiring", "Extract the full department name", None),
+    "position": (
+        "Position(s) Hiring",
+        "Choose one or more appropriate options, separated by commas: "
+        "Postdoc, Assistant Professor, Associate Professor, Full Professor, Lecturer",
+        None),
+    "submission_deadline": (
+        "Submission deadline", 'Format as YYYY-MM-DD. If not specified, write "Not specified"', None),
+    "hiring_areas": (
+        "Hiring areas",
+        "List the main areas of hiring, prioritizing and selecting from the following options: "
+        "Security, Software Engineering, Programming Languages, AI, Machine Learning, Data Science, "
+        "Theory, Systems, Networks, Human-Computer Interaction, Graphics, Robotics. "
+        'For areas not covered by these options, use "Others". '
+        'If the areas are general or not specified, write "All areas"',
+        '["Area 1", "Area 2", ...]'),
+    "recommendation_letters": (
+        "Number of Recommendation Letters or References Required",
+        'Provide the number only. If not specified, write "Not specified"', None),
+    "positions_available": (
+        "Number of positions", 'Provide the number only. If not specified, write "Not specified"', None),
+    "additional_comments": (
+        "Additional important comments",
+        "Summarize any other crucial or noteworthy information relevant to the job listing", None),
+}
+
+# Number words accepted by the regexes below
+_NUMBER_WORDS = {
+    "one": 1, "two": 2, "three": 3, "four": 4, "five": 5,
+    "six": 6, "seven": 7, "eight": 8, "nine": 9, "ten": 10,
+}
+# A whole-word number, not part of a range ("three to five", "3-5") or a choice ("one of the")
+_NUMBER = (r"(?<!\bof the )(?<!\bto )(?<!\bor )(?<![-\u2013])\b(\d{1,2}|" + "|".join(_NUMBER_WORDS) +
+           r")\b(?!\s*(?:[-\u2013]|to\b|or\b|of\b))")
+
+# "three letters of recommendation", "3 reference letters", "names of five referees"
+_LETTERS_RE = re.compile(
+    _NUMBER + r"\s+(?:(?!years?\b|months?\b)[\w-]+\s+){0,2}?(?:letters|references|referees)\b", re.IGNORECASE)
+
+# "two tenure-track positions", "3 faculty openings"
+_POSITIONS_RE = re.compile(
+    _NUMBER + r"\s+(?:(?!years?\b|months?\b)[\w-]+\s+){0,2}?(?:positions|openings)\b", re.IGNORECASE)
+
+# A deadline followed closely by a date such as "January 15, 2025", "15 Jan 2025", "2025-01-15" or "1/15/2025"
+_DEADLINE_RE = re.compile(
+    r"deadline[^.\n\d]{0,40}?"
+    r"(\d{4}-\d{2}-\d{2}|\d{1,2}/\d{1,2}/\d{4}|[A-Z][a-z]{2,8}\.? \d{1,2}(?:st|nd|rd|th)?,? \d{4}|\d{1,2} [A-Z][a-z]{2,8}\.?,? \d{4})",
+    re.IGNORECASE)
+_DATE_FORMATS = ["%Y-%m-%d", "%m/%d/%Y", "%B %d %Y", "%b %d %Y", "%d %B %Y", "%d %b %Y"]
+
+# Comment recorded for jobs OpenAI failed to parse; such rows are re-scraped on the next run
+FAILED_COMMENT = "Failed to parse job details."
+
+# Order of the columns in the output CSV
+CSV_FIELDNAMES = [
+    "Company/University",
+    "Department",
+    "Position",
+    "Hiring Areas",
+    "Location",
+    "Number of Positions",
+    "Submission Deadline",
+    "Number of Recommendation Letters",
+    "Expiration Date",
+    "CRA Link",
+    "Crawl Time",
+    "Posted Date",
+    "Job Type",
+    "Additional Links",
+    "Additional Comments",
+    "CRA ID"
+]
+
+# Resources Chrome never needs to download to render job listings
+BLOCKED_URL_PATTERNS = [
+    "*.png", "*.jpg", "*.jpeg", "*.gif", "*.svg", "*.css", "*.woff", "*.woff2",
+    "*google-analytics*", "*googletagmanager*",
+]
+
+# Validator for the envelope of batch results; each result is then validated on its own
+_validate_results = fastjsonschema.compile({
+    "type": "object",
+    "properties": {"results": {"type": "array"}},
+    "required": ["results"]
+})
+
+# Bump whenever the prompts or schemas change, so results cached by older versions are ignored
+PROMPT_VERSION = 3
+
+# Browser-side MutationObserver that sets a flag whenever job listings are added to the page
+WATCH_LISTINGS_JS = """
+window.__newListings = false;
+new MutationObserver(mutations => {
+    for (const mutation of mutations) {
+        for (const node of mutation.addedNodes) {
+            if (node.nodeType === Node.ELEMENT_NODE &&
+                    (node.matches('.job_listing') || node.querySelector('.job_listing'))) {
+                window.__newListings = true;
+                return;
+            }
+        }
+    }
+}).observe(document.body, {childList: true, subtree: true});
+"""
+
+# Read and reset the flag set by WATCH_LISTINGS_JS
+TAKE_NEW_LISTINGS_JS = "const v = window.__newListings; window.__newListings = false; return v;"
+
+# HTML of the last arguments[0] job listings on the page
+LAST_LISTINGS_JS = (
+    "return Array.from(document.querySelectorAll('.job_listing'))"
+    ".slice(-arguments[0]).map(e => e.outerHTML).join('');"
+)
+
+# HTML of all elements matching the CSS selector arguments[0]
+HTML_FRAGMENTS_JS = (
+    "return Array.from(document.querySelectorAll(arguments[0]))"
+    ".map(e => e.outerHTML).join('');"
+)
+
+# OpenAI errors that every later request would hit too (bad key or model), so they abort the run
+FATAL_API_ERRORS = (AuthenticationError, PermissionDeniedError, NotFoundError)
+
+# Models that support schema-enforced Structured Outputs, and those that only support JSON mode
+STRUCTURED_OUTPUT_MODELS = {"gpt-4o", "gpt-4o-mini"}
+JSON_MODE_MODELS = {"gpt-3.5-turbo"}
+
 
 class ColoredFormatter(logging.Formatter):
     """Custom formatter to add colors and component names to log messages"""
@@ -74,7 +265,7 @@ def setup_logging(log_file='cra_job_crawler.log', log_level=logging.DEBUG):
     root_logger.addHandler(console_handler)
 
     # Suppress logs from dependencies
-    for module in ['selenium', 'urllib3', 'requests', 'openai', 'bs4', 'httpx', 'httpcore']:
+    for module in ['selenium', 'urllib3', 'openai', 'bs4', 'httpx', 'httpcore']:
         logging.getLogger(module).setLevel(logging.WARNING)
 
     # Create and return a logger for this script
@@ -82,61 +273,252 @@ def setup_logging(log_file='cra_job_crawler.log', log_level=logging.DEBUG):
     return logger
 
 
+def positive_int(value):
+    """Parse a command-line integer that must be at least 1."""
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be a positive integer, got {value}")
+    return number
+
+
+def non_negative_int(value):
+    """Parse a command-line integer that must be at least 0."""
+    number = int(value)
+    if number < 0:
+        raise argparse.ArgumentTypeError(f"must be a non-negative integer, got {value}")
+    return number
+
+
 def setup_cli():
     parser = argparse.ArgumentParser(description="CRA Job Crawler")
     parser.add_argument("--csv", default="cra_job_listings.csv",
                         help="Path to CSV file for output and duplicate checking")
     parser.add_argument("--api_key", help="OpenAI API key")
-    parser.add_argument("--model", default="gpt-3.5-turbo",
-                        choices=["gpt-3.5-turbo", "gpt-4", "gpt-4o"], help="OpenAI model to use")
-    parser.add_argument("--chromedriver", required=True,
+    parser.add_argument("--model", default="gpt-4o-mini",
+                        choices=["gpt-3.5-turbo", "gpt-4", "gpt-4o", "gpt-4o-mini"], help="OpenAI model to use")
+    parser.add_argument("--chromedriver",
                         help="Path to chromedriver")
-    parser.add_argument("--additional_links", type=int,
+    parser.add_argument("--selenium_hub", default=os.environ.get("SELENIUM_HUB"),
+                        help="URL of a Selenium Grid or standalone Chrome server to use instead of local Chrome "
+                             "(default: $SELENIUM_HUB)")
+    parser.add_argument("--driver_max_uses", type=non_negative_int, default=50,
+                        help="Restart a Chrome instance after it has loaded this many pages (0 for no limit)")
+    parser.add_argument("--additional_links", type=non_negative_int,
                         default=3, help="Number of additional links to process")
-    parser.add_argument("--max_attempts", type=int, default=3,
-                        help="Maximum number of attempts for parsing job details")
+    parser.add_argument("--workers", type=positive_int, default=4,
+                        help="Number of job pages to extract in parallel")
+    parser.add_argument("--max_attempts", type=positive_int,
+                        help="Maximum number of attempts for parsing job details "
+                             "(default: 1 for models with JSON output, 3 otherwise)")
+    parser.add_argument("--stop_after_seen", type=non_negative_int, default=20,
+                        help="Stop loading older CRA listings after this many consecutive ones already "
+                             "in the CSV (0 to always load the whole index)")
+    parser.add_argument("--batch_size", type=positive_int, default=1,
+                        help="Number of job listings to parse per OpenAI request")
+    parser.add_argument("--max_content_tokens", type=positive_int, default=4000,
+                        help="Maximum number of tokens of job content sent to OpenAI per listing")
+    parser.add_argument("--max_concurrency", type=positive_int, default=10,
+                        help="Maximum number of concurrent OpenAI requests")
+    parser.add_argument("--rpm", type=positive_int, default=500,
+                        help="Maximum number of OpenAI requests per minute")
+    parser.add_argument("--llm_cache", default="cra_llm_cache.db",
+                        help="Path to the on-disk cache of parsed OpenAI results")
+    parser.add_argument("--page_cache", default="cra_page_cache.db",
+                        help="Path to the on-disk cache of fetched job pages and additional links")
+    parser.add_argument("--page_cache_ttl", type=float, default=7,
+                        help="Number of days a cached page stays fresh (0 to always refetch)")
     parser.add_argument("--log_level", default="INFO",
                         choices=["DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"],
                         help="Set the logging level")
-    return parser.parse_args()
+    args = parser.parse_args()
+    if not args.chromedriver and not args.selenium_hub:
+        parser.error("one of --chromedriver or --selenium_hub is required")
+    return args
 
 
 def clean_text(text):
     """Clean text by removing excess whitespace and newlines."""
-    # Replace multiple whitespace characters (including newlines) with a single space
-    text = re.sub(r'\s+', ' ', text)
-    return text.strip()
+    # Splitting on runs of whitespace (including newlines) drops the empty and edge pieces in one C pass
+    return ' '.join(text.split())
+
 
+def strip_boilerplate(text):
+    """Remove copyright notices and similar footer boilerplate from text."""
+    for pattern in _BOILERPLATE_RES:
+        text = pattern.sub('', text)
+    return text
 
-def setup_driver(chromedriver_path):
-    """Set up and return a Selenium WebDriver."""
+
+@functools.lru_cache(maxsize=None)
+def token_encoding(model):
+    """Return the tiktoken encoding used by the model, or None if it can't be loaded (e.g. offline)."""
+    try:
+        return tiktoken.encoding_for_model(model)
+    except Exception:
+        return None
+
+
+def truncate_tokens(text, model, max_tokens):
+    """Truncate text to at most max_tokens tokens of the model's encoding, or 4 characters per token without it."""
+    encoding = token_encoding(model)
+    if encoding is None:
+        return text[:4 * max_tokens]
+    tokens = encoding.encode(text, disallowed_special=())
+    if len(tokens) <= max_tokens:
+        return text
+    return encoding.decode(tokens[:max_tokens])
+
+
+def class_matcher(*class_names):
+    """Return a SoupStrainer attribute matcher for elements having any of the given classes."""
+    def match(value):
+        if value is None:
+            return False
+        classes = value.split() if isinstance(value, str) else value
+        return any(c in class_names for c in classes)
+    return match
+
+
+def setup_driver(chromedriver_path, selenium_hub=None):
+    """Set up and return a Selenium WebDriver, on the given Selenium server if any."""
     chrome_options = Options()
     chrome_options.add_argument("--headless")
+    # Reduce memory pressure, particularly in containers with a small /dev/shm
+    chrome_options.add_argument("--disable-gpu")
+    chrome_options.add_argument("--no-sandbox")
+    chrome_options.add_argument("--disable-dev-shm-usage")
+    # Only the text of pages is read, so skip images; stylesheets and fonts are blocked
+    # by BLOCKED_URL_PATTERNS below, as Chrome has no content setting for them
+    chrome_options.add_argument("--blink-settings=imagesEnabled=false")
+    chrome_options.add_experimental_option("prefs", {
+        "profile.managed_default_content_settings.images": 2,
+        "profile.default_content_setting_values.notifications": 2,
+    })
+    # Every page we load is followed by an explicit wait for the elements we need,
+    # so there is no need to wait for images, fonts and trackers to finish loading
+    chrome_options.page_load_strategy = 'eager'
+    if selenium_hub:
+        # Remote sessions have no CDP command endpoint, so only the options above apply
+        return webdriver.Remote(command_executor=selenium_hub, options=chrome_options)
     service = Service(chromedriver_path)
-    return webdriver.Chrome(service=service, options=chrome_options)
+    driver = webdriver.Chrome(service=service, options=chrome_options)
+    driver.execute_cdp_cmd('Network.enable', {})
+    driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': BLOCKED_URL_PATTERNS})
+    return driver
+
 
+class DriverPool:
+    """Pool of Selenium WebDrivers shared by worker threads, each started on first use.
 
-def fetch_page(driver, logger):
-    """Fetch a page using Selenium with nested loops for scrolling and loading more listings."""
+    A driver is quit and replaced on next use after serving max_uses pages (0 for no limit),
+    or after a page fails with it, so browser state and memory do not grow over long runs.
+    """
+
+    def __init__(self, chromedriver_path, size, selenium_hub=None, max_uses=0):
+        self.chromedriver_path = chromedriver_path
+        self.selenium_hub = selenium_hub
+        self.max_uses = max_uses
+        self.drivers = set()
+        self.lock = threading.Lock()
+        self.available = queue.Queue()
+        for _ in range(size):
+            self.available.put((None, 0))
+
+    def retire(self, driver):
+        """Quit a driver and stop tracking it."""
+        with self.lock:
+            self.drivers.discard(driver)
+        try:
+            driver.quit()
+        except Exception:
+            pass
+
+    @contextmanager
+    def acquire(self):
+        """Check out a driver for exclusive use, starting it if needed."""
+        driver, uses = self.available.get()
+        try:
+            if driver is None:
+                driver = setup_driver(self.chromedriver_path, self.selenium_hub)
+                with self.lock:
+                    self.drivers.add(driver)
+            else:
+                # Reset state left by the previous page instead of starting a fresh browser
+                driver.delete_all_cookies()
+            uses += 1
+            yield driver
+        except BaseException:
+            if driver is not None:
+                self.retire(driver)
+                driver = None
+            raise
+        finally:
+            if driver is not None and self.max_uses and uses >= self.max_uses:
+                self.retire(driver)
+                driver = None
+            self.available.put((driver, uses) if driver is not None else (None, 0))
+
+    def quit(self):
+        """Quit all drivers started by the pool, ignoring any that fail to quit."""
+        with self.lock:
+            drivers = list(self.drivers)
+        for driver in drivers:
+            self.retire(driver)
+
+
+def watch_job_listings(driver):
+    """Install a MutationObserver in the browser that flags when new job listings are added."""
+    driver.execute_script(WATCH_LISTINGS_JS)
+
+
+def new_listings_loaded(driver):
+    """Return whether job listings were added since the last call, resetting the flag."""
+    return driver.execute_script(TAKE_NEW_LISTINGS_JS)
+
+
+def fetch_listing_page(driver, logger, parse_only=None, early_stop=None):
+    """Fetch the job listing index with Selenium, scrolling and loading more listings until all show.
+
+    If parse_only is given, only the matching parts of the page are parsed. If early_stop is given,
+    it is called with the driver after each batch of listings loads, and loading stops once it
+    returns True.
+    """
+    watch_job_listings(driver)
     while True:  # Outer loop for scrolling
         last_height = driver.execute_script("return document.body.scrollHeight")
         
         while True:  # Inner loop for clicking "Load more listings"
             # Scroll down to bottom
             driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-            time.sleep(2)  # Wait for the page to load
 
             try:
-                load_more_button = WebDriverWait(driver, 10).until(
+                # A missing button means everything is loaded, so don't wait long for it
+                load_more_button = WebDriverWait(driver, 2).until(
                     EC.element_to_be_clickable((By.CLASS_NAME, "load_more_jobs"))
                 )
+                new_listings_loaded(driver)  # Clear any earlier additions
                 driver.execute_script("arguments[0].click();", load_more_button)
                 logger.info("Clicked 'Load more listings' button")
-                time.sleep(2)  # Wait for new listings to load
+                # Wait until new listings show up rather than sleeping a fixed time
+                try:
+                    WebDriverWait(driver, 5, poll_frequency=0.1).until(new_listings_loaded)
+                except TimeoutException:
+                    logger.warning("No new listings appeared after clicking 'Load more listings'")
+                    break
+                if early_stop is not None and early_stop(driver):
+                    logger.info("Latest listings are already known, not loading older ones.")
+                    return BeautifulSoup(driver.page_source, 'lxml', parse_only=parse_only)
             except (TimeoutException, NoSuchElementException):
                 logger.info("No more 'Load more listings' button found. Moving to next scroll.")
                 break  # Break the inner loop to move to the next scroll
 
+        # Let content triggered by the scroll finish loading before comparing heights
+        try:
+            WebDriverWait(driver, 10, poll_frequency=0.25).until(
+                lambda d: d.execute_script("return document.readyState") == "complete")
+        except TimeoutException:
+            logger.warning("Page did not finish loading, checking its height anyway")
+
         # Check if the page height has changed
         new_height = driver.execute_script("return document.body.scrollHeight")
         if new_height == last_height:
@@ -146,11 +528,15 @@ def fetch_page(driver, logger):
         logger.info("Page height changed, continuing to scroll.")
 
     page_source = driver.page_source
-    return BeautifulSoup(page_source, 'html.parser')
+    return BeautifulSoup(page_source, 'lxml', parse_only=parse_only)
+
 
+def fetch_cra_jobs(driver, logger, existing_jobs=frozenset(), stop_after_seen=0):
+    """Fetch job listings from CRA website using Selenium.
 
-def fetch_cra_jobs(driver, logger):
-    """Fetch job listings from CRA website using Selenium."""
+    If stop_after_seen is positive, stop loading older listings once that many of the most recently
+    loaded ones are all in existing_jobs.
+    """
     url = "https://cra.org/ads/"
     driver.get(url)
 
@@ -158,197 +544,611 @@ def fetch_cra_jobs(driver, logger):
     WebDriverWait(driver, 20).until(
         EC.presence_of_element_located((By.CLASS_NAME, "job_listings"))
     )
-    soup = fetch_page(driver, logger)
+    strainer = SoupStrainer('li', class_=class_matcher('job_listing'))
+
+    def seen(card):
+        try:
+            return parse_listing_card(card)[1] in existing_jobs
+        except Exception:
+            # A malformed card can't be matched, so it doesn't count as seen
+            return False
+
+    def all_seen(driver):
+        # Listings are newest first, so once a full run of them is known, so are the older ones
+        html = driver.execute_script(LAST_LISTINGS_JS, stop_after_seen)
+        cards = BeautifulSoup(html, 'lxml', parse_only=strainer).find_all('li', class_='job_listing')
+        return len(cards) == stop_after_seen and all(seen(card) for card in cards)
+
+    soup = fetch_listing_page(
+        driver, logger, parse_only=strainer, early_stop=all_seen if stop_after_seen > 0 else None)
     return soup.find_all('li', class_='job_listing')
 
 
-def extract_job_details(driver, existing_jobs, job, num_additional_links, logger):
-    """Extract basic details from a job listing and fetch full description."""
+class PageCache:
+    """SQLite cache of fetch outcomes keyed by URL, so reruns don't fetch unchanged or dead pages again.
+
+    Each entry holds the HTTP status and, for successful fetches, the HTML. Only lasting failures such as 404s
+    and non-HTML responses are cached; rate limits, server errors and timeouts are retried on the next run.
+    """
+
+    def __init__(self, path, ttl):
+        self.ttl = ttl
+        self.conn = sqlite3.connect(path)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS pages "
+            "(url TEXT PRIMARY KEY, fetched_at INTEGER, status INTEGER, html TEXT)")
+
+    def get(self, url):
+        """Return the cached (status, html) of url, or None if it is missing or older than the TTL."""
+        if self.ttl <= 0:
+            return None
+        return self.conn.execute(
+            "SELECT status, html FROM pages WHERE url = ? AND fetched_at >= ?",
+            (url, int(time.time() - self.ttl))).fetchone()
+
+    def put(self, url, status, html=None):
+        """Store the outcome of fetching url, replacing any older one."""
+        self.conn.execute(
+            "INSERT OR REPLACE INTO pages (url, fetched_at, status, html) VALUES (?, ?, ?, ?)",
+            (url, int(time.time()), status, html))
+        self.conn.commit()
+
+    def close(self):
+        """Close the cache database."""
+        self.conn.close()
+
+
+def content_type(response):
+    """Return the media type of a response, without parameters such as the charset."""
+    return response.headers.get('content-type', '').split(';')[0].strip().lower()
+
+
+async def read_html(response):
+    """Return the text of a successful HTML response, read up to MAX_PAGE_BYTES, or None for any other response."""
+    if not response.is_success or content_type(response) not in HTML_CONTENT_TYPES:
+        return None
+    body = bytearray()
+    async for chunk in response.aiter_bytes():
+        body += chunk
+        if len(body) >= MAX_PAGE_BYTES:
+            break
+    return bytes(body[:MAX_PAGE_BYTES]).decode(response.encoding or 'utf-8', errors='replace')
+
+
+async def fetch_static(client, page_cache, url, timeout):
+    """Fetch a page over plain HTTP (or from page_cache) and parse it, retrying transient failures with backoff."""
+    cached = page_cache.get(url)
+    if cached is not None:
+        status, html = cached
+        if html is None:
+            raise httpx.HTTPError(f"Fetching {url} recently failed or returned no HTML (status {status})")
+        return LexborHTMLParser(html)
+    for retry in range(HTTP_RETRIES + 1):
+        try:
+            # Streamed, so the body of a non-HTML or oversized response is never downloaded in full
+            async with client.stream('GET', url, timeout=timeout) as response:
+                if response.status_code not in RETRY_STATUSES or retry == HTTP_RETRIES:
+                    html = await read_html(response)
+                    break
+        except httpx.TransportError:
+            if retry == HTTP_RETRIES:
+                raise
+        await asyncio.sleep(0.3 * 2 ** retry)
+    if response.status_code not in TRANSIENT_STATUSES and response.status_code < 500:
+        page_cache.put(url, response.status_code, html)
+    response.raise_for_status()
+    if html is None:
+        raise httpx.HTTPError(f"{url} is not an HTML page ({content_type(response) or 'no content type'})")
+    return LexborHTMLParser(html)
+
+
+async def fetch_link_text(client, page_cache, url):
+    """Fetch a linked page over plain HTTP and return its cleaned text."""
+    tree = await fetch_static(client, page_cache, url, timeout=10)
+    # Drop code and page chrome that only inflates the prompt
+    for node in tree.css('script, style, nav, footer, header, form'):
+        node.decompose()
+    # Only read the main content when the page marks it up, skipping sidebars and other chrome
+    content = tree.css_first('main') or tree.css_first('article') or tree.body
+    if content is None:
+        return ""
+    # Only the start of the page is kept, so cap the raw text before cleaning it, leaving
+    # headroom for the whitespace that cleaning removes
+    text = content.text(separator=' ', strip=True)[:4 * ADDITIONAL_CONTENT_CHARS]
+    return clean_text(strip_boilerplate(text))[:ADDITIONAL_CONTENT_CHARS]
+
+
+def get_html_fragments(driver, selector):
+    """Return the concatenated HTML of the elements matching a CSS selector, without transferring the whole page."""
+    return driver.execute_script(HTML_FRAGMENTS_JS, selector)
+
+
+def fetch_detail_page(driver_pool, link):
+    """Load a job detail page in Chrome and return the rendered description and metadata HTML."""
+    with driver_pool.acquire() as driver:
+        driver.get(link)
+        WebDriverWait(driver, 10).until(
+            EC.presence_of_element_located((By.CLASS_NAME, "job_description"))
+        )
+        return get_html_fragments(driver, 'div.job_description, ul.meta')
+
+
+async def fetch_job_page(client, page_cache, driver_pool, executor, link, logger):
+    """Fetch a job detail page over plain HTTP, falling back to Selenium if it needs JavaScript."""
+    try:
+        tree = await fetch_static(client, page_cache, link, timeout=15)
+        if tree.css_first('div.job_description') is not None:
+            return tree
+        logger.info(f"No job description in static HTML of {link}, falling back to Selenium")
+    except httpx.HTTPError as e:
+        logger.warning(f"Error fetching {link} over HTTP, falling back to Selenium: {e}")
+
+    # Selenium is blocking, so it runs on the executor to keep other jobs moving
+    loop = asyncio.get_running_loop()
+    page_source = await loop.run_in_executor(executor, fetch_detail_page, driver_pool, link)
+    # Cache the rendered fragments so later runs skip both the static fetch and Selenium
+    page_cache.put(link, 200, page_source)
+    return LexborHTMLParser(page_source)
+
+
+def parse_listing_card(job):
+    """Return the CRA ID, link, location and job type of a job listing card, without fetching anything."""
     title = job.find('h3').text.strip()
     link = job.find('a')['href']
-    company = job.find('div', class_='location').find('strong').text.strip()
-    location = job.find('div', class_='location').text.replace(
-        company, "").strip()
+    location_div = job.find('div', class_='location')
+    company = location_div.find('strong').text.strip()
+    location = location_div.text.replace(company, "").strip()
     job_type = job.find('li', class_='job-type').text.strip()
+    return f"{company} ({location}): {title}", link, location, job_type
+
 
-    title = f"{company} ({location}): {title}"
-    if title in existing_jobs:
-        logger.info(f"Skipping duplicate job: {title}")
-        return None, None, None, None, None, None, None, None
+async def extract_job_details(client, page_cache, driver_pool, executor, card, num_additional_links, logger):
+    """Fetch the full description of a job listing card parsed by parse_listing_card."""
+    title, link, location, job_type = card
 
     # Fetch the detailed job page
-    driver.get(link)
-    WebDriverWait(driver, 10).until(
-        EC.presence_of_element_located((By.CLASS_NAME, "job_description"))
-    )
-    soup = fetch_page(driver, logger)
+    tree = await fetch_job_page(client, page_cache, driver_pool, executor, link, logger)
 
     # Extract full description
-    job_description_div = soup.find('div', class_='job_description')
-    full_description = job_description_div.text.strip()
-
-    # Find and follow links in the job description
+    job_description_div = tree.css_first('div.job_description')
+    full_description = _BLANK_LINES_RE.sub('\n\n', job_description_div.text().strip())
+
+    # Find the links in the job description, resolving relative ones against the job page
+    hrefs = [(a.attributes['href'] or '').strip() for a in job_description_div.css('a[href]')]
+    # Skip empty, in-page and mail links, and drop fragments so each page is only fetched once
+    additional_links = list(dict.fromkeys(
+        urldefrag(urljoin(link, href))[0] for href in hrefs
+        if href and not href.startswith(('mailto:', '#'))))
+    logger.debug(f"Found {len(additional_links)} additional links in {link}")
+
+    # Limit to first n links to avoid overloading, fetching them concurrently
+    targets = additional_links[:num_additional_links]
+    results = await asyncio.gather(
+        *(fetch_link_text(client, page_cache, href) for href in targets), return_exceptions=True)
     additional_content = []
-    additional_links = []
-    links = job_description_div.find_all('a', href=True)
-    for i, a in enumerate(links):
-        href = a['href']
-        logger.debug(f"Processing additional link {i+1}: {href}")
-        if href.startswith('mailto:'):
-            logger.info(f"Skipping mailto link: {href}")
+    for href, link_text in zip(targets, results):
+        if isinstance(link_text, Exception):
+            logger.error(f"Error fetching content from {href}: {link_text}")
             continue
-        if not href.startswith('http'):
-            href = urljoin(link, href)
-        additional_links.append(href)
-
-        # Limit to first n links to avoid overloading
-        if len(additional_links) < num_additional_links:
-            try:
-                driver.get(href)
-                WebDriverWait(driver, 20).until(
-                    EC.presence_of_element_located((By.TAG_NAME, "body"))
-                )
-                link_soup = fetch_page(driver, logger)
-                link_text = clean_text(link_soup.get_text())
-                # Truncate to first 10000 characters to avoid overwhelming ChatGPT
-                additional_content.append(
-                    f"    Additional content from {href}:\n    {link_text[:10000]}...")
-                logger.debug(f"Successfully extracted content from {href}")
-            except Exception as e:
-                logger.error(f"Error fetching content from {href}: {e}")
+        additional_content.append(
+            f"{ADDITIONAL_CONTENT_PREFIX}{href}:\n    {link_text}...")
+        logger.debug(f"Successfully extracted content from {href}")
 
     # Combine original description with additional content
     full_content = full_description + "\n\n" + "\n\n".join(additional_content)
 
     # Extract posted date and expiration date
-    meta = soup.find('ul', class_='meta')
-    posted_date = meta.find('li', class_='date-posted').text.strip()
-    expiration_date = meta.find_all(
-        'li', class_='date-posted')[1].text.replace("Expires on:", "").strip()
+    date_nodes = tree.css_first('ul.meta').css('li.date-posted')
+    posted_date = date_nodes[0].text().strip()
+    expiration_date = date_nodes[1].text().replace("Expires on:", "").strip()
 
-    logger.info(f"Successfully extracted details for job: {title} ({company})")
-    time.sleep(1)  # Be nice to the server
+    logger.info(f"Successfully extracted details for job: {title}")
 
     return title, link, location, job_type, full_content, posted_date, expiration_date, additional_links
 
 
-def query_openai(prompt, model):
-    """Query OpenAI API for information extraction."""
-    client = OpenAI(api_key=os.environ.get("OPENAI_API_KEY"))
-    response = client.chat.completions.create(
-        model=model,
-        messages=[
-            {"role": "system", "content": "You are a helpful assistant that extracts specific information from job listings."},
-            {"role": "user", "content": prompt}
-        ]
-    )
-    return response.choices[0].message.content
-
+def strict_schema(schema):
+    """Return a copy of the schema in which every object forbids additional properties."""
+    if schema.get("type") == "object":
+        schema = dict(schema, additionalProperties=False, properties={
+            key: strict_schema(value) for key, value in schema["properties"].items()})
+    elif schema.get("type") == "array":
+        schema = dict(schema, items=strict_schema(schema["items"]))
+    return schema
+
+
+def response_format_for(model, schema, name):
+    """Return the strictest JSON response format the model supports, or None."""
+    if model in STRUCTURED_OUTPUT_MODELS:
+        # Strict mode requires every object to forbid additional properties
+        return {
+            "type": "json_schema",
+            "json_schema": {"name": name, "schema": strict_schema(schema), "strict": True}
+        }
+    if model in JSON_MODE_MODELS:
+        return {"type": "json_object"}
+    return None
+
+
+async def query_openai(client, prompt, model, limiter, logger, response_format=None, max_retries=5):
+    """Query OpenAI API for information extraction, backing off on rate limits."""
+    extra_args = {}
+    if response_format is not None:
+        extra_args["response_format"] = response_format
+    for retry in range(max_retries):
+        try:
+            async with limiter:
+                response = await client.chat.completions.create(
+                    model=model,
+                    messages=[
+                        {"role": "system", "content": "You are a helpful assistant that extracts specific information from job listings."},
+                        {"role": "user", "content": prompt}
+                    ],
+                    **extra_args
+                )
+            return response.choices[0].message.content
+        except RateLimitError:
+            if retry == max_retries - 1:
+                raise
+            delay = 2 ** retry
+            logger.warning(f"Rate limited by OpenAI, retrying in {delay}s")
+            await asyncio.sleep(delay)
+
+
+def llm_cache_key(model, title, details):
+    """Return the cache key for parsing the given job listing with the given model."""
+    digest = hashlib.blake2b(f"{title}|{details}".encode('utf-8')).hexdigest()
+    return f"{model}:v{PROMPT_VERSION}:{digest}"
+
+
+@functools.lru_cache(maxsize=None)
+def job_schemas(omitted_fields):
+    """Return the single and batch job schemas without the omitted fields, and a compiled job validator."""
+    properties = {
+        field: schema for field, schema in JOB_SCHEMA["properties"].items() if field not in omitted_fields}
+    job_schema = {"type": "object", "properties": properties, "required": list(properties)}
+    batch_schema = {
+        "type": "object",
+        "properties": {"results": {"type": "array", "items": job_schema}},
+        "required": ["results"]
+    }
+    return job_schema, batch_schema, fastjsonschema.compile(job_schema)
 
-def parse_job_details(title, details, max_attempts, model, logger):
-    """Parse job details using OpenAI API with structured format and JSON output."""
-    # flake8: noqa: E501
-    prompt = f"""
-    Analyze the following job listing title and details. Extract the requested information following the format and instructions carefully, then return the result as a JSON object.
 
-    Job title: {title}
-    Job listing details:
-    {details}
+def parse_number(word):
+    """Return the integer for a number matched by _NUMBER."""
+    return int(word) if word.isdigit() else _NUMBER_WORDS[word.lower()]
 
-    Follow these instructions for each field:
 
-    1. University or company name:
-    Extract the full name
+def parse_date(text):
+    """Return the date matched by _DEADLINE_RE as YYYY-MM-DD, or None if it is not a valid date."""
+    text = re.sub(r'(?<=\d)(?:st|nd|rd|th)\b|[.,]', '', text)
+    for date_format in _DATE_FORMATS:
+        try:
+            return datetime.strptime(text, date_format).strftime("%Y-%m-%d")
+        except ValueError:
+            continue
+    return None
 
-    2. Department that is hiring:
-    Extract the full department name
 
-    3. Position(s) Hiring:
-    Choose one or more appropriate options, separated by commas: Postdoc, Assistant Professor, Associate Professor, Full Professor, Lecturer
+def single_match(regex, text, convert):
+    """Return the converted value of regex's matches in text if they all agree, or None."""
+    values = {convert(match.group(1)) for match in regex.finditer(text)} - {None}
+    return values.pop() if len(values) == 1 else None
 
-    4. Submission deadline:
-    Format as YYYY-MM-DD. If not specified, write "Not specified"
 
-    5. Hiring areas:
-    List the main areas of hiring, prioritizing and selecting from the following options: Security, Software Engineering, Programming Languages, AI, Machine Learning, Data Science, Theory, Systems, Networks, Human-Computer Interaction, Graphics, Robotics. For areas not covered by these options, use "Others". If the areas are general or not specified, write "All areas"
+def quick_extract(details):
+    """Extract the fields that regular expressions find reliably, so OpenAI need not be asked for them.
 
-    6. Number of Recommendation Letters or References Required:
-    Provide the number only. If not specified, write "Not specified"
+    Only the job description is searched, not the text of additional links, which may describe
+    other programs. Returns only the fields stated exactly one way; the rest are left to OpenAI.
+    """
+    text = details.split("\n\n" + ADDITIONAL_CONTENT_PREFIX, 1)[0]
+    extractors = {
+        "recommendation_letters": (_LETTERS_RE, lambda number: str(parse_number(number))),
+        "positions_available": (_POSITIONS_RE, lambda number: str(parse_number(number))),
+        "submission_deadline": (_DEADLINE_RE, parse_date),
+    }
+    fields = {}
+    for field, (regex, convert) in extractors.items():
+        value = single_match(regex, text, convert)
+        if value is not None:
+            fields[field] = value
+    return fields
 
-    7. Number of positions:
-    Provide the number only. If not specified, write "Not specified"
 
-    8. Additional important comments:
-    Summarize any other crucial or noteworthy information relevant to the job listing
+def build_prompt(listings, omitted_fields=frozenset()):
+    """Build the OpenAI prompt for a list of (title, details) job listings, leaving out omitted_fields."""
+    # flake8: noqa: E501
+    fields = [field for field in FIELD_PROMPTS if field not in omitted_fields]
+    instructions = "\n    Follow these instructions for each field:\n" + "".join(
+        f"\n    {i}. {FIELD_PROMPTS[field][0]}:\n    {FIELD_PROMPTS[field][1]}\n"
+        for i, field in enumerate(fields, 1)) + "    "
+    answers = []
+    for i, field in enumerate(fields, 1):
+        example = FIELD_PROMPTS[field][2] or f'"Answer for item {i}"'
+        answers.append(f'        "{field}": {example}')
+    structure = "{\n" + ",\n".join(answers) + "\n    }"
+
+    if len(listings) == 1:
+        title, details = listings[0]
+        return f"""
+    Analyze the following job listing title and details. Extract the requested information following the format and instructions carefully, then return the result as a JSON object.
 
+    Job title: {title}
+    Job listing details:
+    {details}
+    {instructions}
     Return a JSON object with the following structure:
-    {{
-        "university_name": "Answer for item 1",
-        "department": "Answer for item 2",
-        "position": "Answer for item 3",
-        "submission_deadline": "Answer for item 4",
-        "hiring_areas": ["Area 1", "Area 2", ...],
-        "recommendation_letters": "Answer for item 6",
-        "positions_available": "Answer for item 7",
-        "additional_comments": "Answer for item 8"
-    }}
+    {structure}
 
     Ensure all fields are present in the JSON, even if the information is not available (use null or appropriate default values in such cases).
     """
 
-    schema = {
-        "type": "object",
-        "properties": {
-            "university_name": {"type": "string"},
-            "department": {"type": "string"},
-            "position": {"type": "string"},
-            "submission_deadline": {"type": "string"},
-            "hiring_areas": {"type": "array", "items": {"type": "string"}},
-            "recommendation_letters": {"type": ["string", "integer"]},
-            "positions_available": {"type": ["string", "integer"]},
-            "additional_comments": {"type": "string"}
-        },
-        "required": ["university_name", "department", "position", "submission_deadline", "hiring_areas", "recommendation_letters", "positions_available", "additional_comments"]
+    numbered_listings = "\n".join(
+        f"""
+    Listing {i}:
+    Job title: {title}
+    Job listing details:
+    {details}
+    """ for i, (title, details) in enumerate(listings, 1))
+    return f"""
+    Analyze each of the following {len(listings)} job listings. For each listing, extract the requested information following the format and instructions carefully, then return the results as a JSON object.
+    {numbered_listings}
+    {instructions}
+    Return a JSON object with a "results" array holding one object per listing, in the same order as the listings above. Each object must have the following structure:
+    {{"results": [{structure}, ...]}}
+
+    Ensure all fields are present in every object, even if the information is not available (use null or appropriate default values in such cases).
+    """
+
+
+def default_job_details():
+    """Return the details recorded for a job that could not be parsed."""
+    return {
+        "university_name": "Not specified",
+        "department": "Not specified",
+        "position": "Not specified",
+        "submission_deadline": "Not specified",
+        "hiring_areas": ["Not specified"],
+        "recommendation_letters": "Not specified",
+        "positions_available": 1,
+        "additional_comments": FAILED_COMMENT
     }
 
+
+async def parse_job_details(client, listings, max_attempts, model, limiter, cache, logger):
+    """Parse a batch of (title, details) job listings with a single OpenAI request.
+
+    Returns the parsed details of each listing, in order. Cached listings are not sent to OpenAI,
+    and listings whose results keep failing in a batch are retried one request each.
+    """
+    parsed_jobs = [None] * len(listings)
+    cache_keys = [llm_cache_key(model, title, details) for title, details in listings]
+    pending = []
+    for i, (title, _) in enumerate(listings):
+        if cache_keys[i] in cache:
+            logger.info(f"Using cached job details for {title}")
+            parsed_jobs[i] = orjson.loads(cache[cache_keys[i]])
+        else:
+            pending.append(i)
+    if not pending:
+        return parsed_jobs
+
+    async def parse_individually(indices):
+        results = await asyncio.gather(*(
+            parse_job_details(client, [listings[i]], max_attempts, model, limiter, cache, logger)
+            for i in indices))
+        for i, [parsed_details] in zip(indices, results):
+            parsed_jobs[i] = parsed_details
+
+    pending_listings = [listings[i] for i in pending]
+    titles = "; ".join(title for title, _ in pending_listings)
+    # Fields found by regex in every listing are left out of the prompt and filled in afterwards
+    extracted = [quick_extract(details) for _, details in pending_listings]
+    omitted_fields = frozenset.intersection(*(frozenset(fields) for fields in extracted))
+    prompt = build_prompt(pending_listings, omitted_fields)
+    job_schema, batch_schema, validate_job = job_schemas(omitted_fields)
+    if len(pending) == 1:
+        schema, schema_name = job_schema, "job"
+    else:
+        schema, schema_name = batch_schema, "jobs"
+    response_format = response_format_for(model, schema, schema_name)
+
     for attempt in range(max_attempts):
         try:
             logger.debug(
                 f"Attempting to parse job details (attempt {attempt+1}/{max_attempts})")
             logger.debug(f"Prompt to {model}: {prompt}")
-            response = query_openai(prompt, model)
+            response = await query_openai(
+                client, prompt, model, limiter, logger, response_format=response_format)
             logger.debug(f"Response from {model}: {response}")
-            parsed_json = json.loads(response)
-            jsonschema.validate(instance=parsed_json, schema=schema)
-            return parsed_json
-        except (json.JSONDecodeError, jsonschema.exceptions.ValidationError) as e:
+            parsed_json = orjson.loads(response)
+            if len(pending) == 1:
+                validate_job(parsed_json)
+                results = [parsed_json]
+            else:
+                _validate_results(parsed_json)
+                results = parsed_json["results"]
+                if len(results) != len(pending):
+                    raise ValueError(
+                        f"Expected {len(pending)} results but got {len(results)}")
+            # Keep the valid results of a batch and only re-parse the invalid ones
+            invalid = []
+            for i, fields, parsed_details in zip(pending, extracted, results):
+                try:
+                    validate_job(parsed_details)
+                except fastjsonschema.JsonSchemaException as e:
+                    logger.debug(f"Invalid result from {model} for {listings[i][0]}: {e}")
+                    invalid.append(i)
+                    continue
+                parsed_details.update((field, fields[field]) for field in omitted_fields)
+                cache[cache_keys[i]] = orjson.dumps(parsed_details)
+                parsed_jobs[i] = parsed_details
+            if invalid:
+                logger.warning(
+                    f"{len(invalid)} of {len(pending)} results in batch were invalid. Parsing them one at a time.")
+                await parse_individually(invalid)
+            return parsed_jobs
+        except FATAL_API_ERRORS:
+            raise
+        except (ValueError, fastjsonschema.JsonSchemaException, APIError) as e:
+            logger.debug(f"Invalid response from {model}: {e}")
+            if attempt == max_attempts - 1 and len(pending) > 1:
+                logger.warning(
+                    f"All attempts ({max_attempts}) failed on batch {titles}. Parsing its jobs one at a time.")
+                await parse_individually(pending)
+                return parsed_jobs
             if attempt == max_attempts - 1:
                 logger.error(
-                    f"All attempts ({max_attempts}) failed on {title}. Returning default values.")
-                return {
-                    "university_name": "Not specified",
-                    "department": "Not specified",
-                    "position": "Not specified",
-                    "submission_deadline": "Not specified",
-                    "hiring_areas": ["Not specified"],
-                    "recommendation_letters": "Not specified",
-                    "positions_available": 1,
-                    "additional_comments": "Failed to parse job details."
-                }
+                    f"All attempts ({max_attempts}) failed on {titles}. Returning default values.")
+                for i in pending:
+                    parsed_jobs[i] = default_job_details()
+                return parsed_jobs
+
+
+async def extract_all_jobs(cards, page_cache, driver_pool, existing_jobs, num_additional_links, workers, job_queue, logger):
+    """Extract up to workers listing cards at once, queueing each job as soon as it is extracted.
+
+    cards must already exclude listings in existing_jobs; extracted jobs are added to it.
+    """
+    semaphore = asyncio.Semaphore(workers)
+
+    async def extract_one(card):
+        async with semaphore:
+            try:
+                details = await extract_job_details(
+                    client, page_cache, driver_pool, executor, card, num_additional_links, logger)
+            except Exception as e:
+                # Skip the job rather than abort the crawl; it is retried on the next run
+                logger.error(f"Error extracting job listing: {e}")
+                return
+        existing_jobs.add(details[1])
+        crawl_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        await job_queue.put((crawl_time, details))
+
+    # Pages are fetched with one pooled HTTP client; the executor only runs Selenium fallbacks
+    async with httpx.AsyncClient(headers=HTTP_HEADERS, follow_redirects=True) as client:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            await asyncio.gather(*(extract_one(card) for card in cards))
+
+
+async def parse_queued_jobs(client, job_queue, max_attempts, model, batch_size, max_content_tokens, max_concurrency, rpm, cache, on_parsed, logger):
+    """Parse extracted jobs from the queue in batches with the OpenAI client until None is queued.
+
+    Up to max_concurrency batches are parsed at once, subject to an RPM limiter. on_parsed is
+    called with each job's crawl time, details and parsed details as soon as it is parsed.
+    """
+    limiter = AsyncLimiter(rpm, 60)
+
+    async def next_batch():
+        # Wait for one job, then take any others already queued, up to batch_size
+        batch = []
+        item = await job_queue.get()
+        while item is not None:
+            batch.append(item)
+            if len(batch) == batch_size or job_queue.empty():
+                return batch
+            item = job_queue.get_nowait()
+        # Leave the end marker for the other workers
+        await job_queue.put(None)
+        return batch
+
+    async def parse_worker():
+        while batch := await next_batch():
+            listings = [(details[0], truncate_tokens(details[4], model, max_content_tokens))
+                        for _, details in batch]
+            parsed_jobs = await parse_job_details(
+                client, listings, max_attempts, model, limiter, cache, logger)
+            for (crawl_time, details), parsed_details in zip(batch, parsed_jobs):
+                on_parsed(crawl_time, details, parsed_details)
+
+    await asyncio.gather(*(parse_worker() for _ in range(max_concurrency)))
+
+
+def build_job_info(crawl_time, details, parsed_details):
+    """Combine the scraped and parsed details of a job into a CSV row."""
+    title, link, location, job_type, full_content, posted_date, expiration_date, additional_links = details
+    return {
+        "Crawl Time": crawl_time,
+        "Company/University": parsed_details["university_name"],
+        "Department": parsed_details["department"],
+        "Position": parsed_details["position"],
+        "Job Type": job_type,
+        "Location": location,
+        "Number of Positions": parsed_details["positions_available"],
+        "Hiring Areas": ", ".join(parsed_details["hiring_areas"]),
+        "Submission Deadline": parsed_details["submission_deadline"],
+        "Number of Recommendation Letters": parsed_details["recommendation_letters"],
+        "Posted Date": posted_date,
+        "Expiration Date": expiration_date,
+        "CRA Link": link,
+        "Additional Comments": parsed_details["additional_comments"],
+        "Additional Links": "\n".join(additional_links),
+        "CRA ID": title
+    }
 
 
 def load_existing_jobs(csv_path):
-    existing_jobs = {}
-    if os.path.exists(csv_path):
-        with open(csv_path, 'r', newline='', encoding='utf-8') as csvfile:
-            reader = csv.DictReader(csvfile)
-            for row in reader:
-                if row.get('Additional Comments') != "Failed to parse job details.":
-                    # Store the entire valid row, indexed by its title (or another unique field)
-                    existing_jobs[row.get('CRA ID', '')] = row
+    """Return the CRA links of the jobs already parsed successfully in the CSV."""
+    existing_jobs = set()
+    if not os.path.exists(csv_path):
+        return existing_jobs
+    with open(csv_path, 'r', newline='', encoding='utf-8') as csvfile:
+        # Plain rows indexed by column are much cheaper than a dict per row
+        reader = csv.reader(csvfile)
+        header = next(reader, [])
+        # Links identify listings uniquely, unlike CRA IDs, which can repeat across ads
+        if 'CRA Link' not in header:
+            return existing_jobs
+        link_index = header.index('CRA Link')
+        comment_index = header.index('Additional Comments') if 'Additional Comments' in header else None
+        for row in reader:
+            if link_index >= len(row):
+                continue
+            if comment_index is None or comment_index >= len(row) or row[comment_index] != FAILED_COMMENT:
+                existing_jobs.add(row[link_index])
     return existing_jobs
 
 
+def open_csv_checkpoint(csv_path, tmp_path, rescraped_links=frozenset()):
+    """Start a new CSV at tmp_path with the rows of csv_path, ready for new jobs to be streamed in.
+
+    Failed rows are left out if their CRA link is in rescraped_links, as those jobs are scraped again.
+    """
+    csvfile = open(tmp_path, 'w', newline='', encoding='utf-8')
+    if not os.path.exists(csv_path):
+        writer = csv.DictWriter(csvfile, fieldnames=CSV_FIELDNAMES, restval="N/A")
+        writer.writeheader()
+        return csvfile, writer
+
+    with open(csv_path, 'r', newline='', encoding='utf-8') as old_csvfile:
+        reader = csv.reader(old_csvfile)
+        old_fieldnames = next(reader, [])
+        # Ensure all columns are included, even if not in our predefined order
+        known_fieldnames = set(CSV_FIELDNAMES)
+        fieldnames = CSV_FIELDNAMES + [
+            key for key in old_fieldnames if key not in known_fieldnames]
+
+        writer = csv.DictWriter(csvfile, fieldnames=fieldnames, restval="N/A")
+        writer.writeheader()
+        # Copy rows across one at a time as plain lists, reordering columns by index;
+        # failed ones being re-scraped are dropped, and kept otherwise until a later run reaches them
+        old_index = {key: i for i, key in enumerate(old_fieldnames)}
+        columns = [old_index.get(key) for key in fieldnames]
+        comment_index = old_index.get('Additional Comments')
+        link_index = old_index.get('CRA Link')
+        row_writer = csv.writer(csvfile)
+        for row in reader:
+            failed = comment_index is not None and comment_index < len(row) and row[comment_index] == FAILED_COMMENT
+            if failed and link_index is not None and link_index < len(row) and row[link_index] in rescraped_links:
+                continue
+            row_writer.writerow(
+                [row[i] if i is not None and i < len(row) else "N/A" for i in columns])
+    csvfile.flush()
+    return csvfile, writer
+
+
 def main():
     args = setup_cli()
     logger = setup_logging(log_level=getattr(logging, args.log_level))
@@ -357,12 +1157,36 @@ def main():
     if args.api_key:
         os.environ["OPENAI_API_KEY"] = args.api_key
 
+    if args.max_attempts is None:
+        # Models that return JSON (and enforce the schema) rarely need a retry
+        args.max_attempts = 1 if response_format_for(args.model, JOB_SCHEMA, "job") else 3
+
     existing_jobs = load_existing_jobs(args.csv)
     logger.info(f"Loaded {len(existing_jobs)} existing jobs from {args.csv}")
 
-    driver = setup_driver(args.chromedriver)
+    # Results are streamed into a temporary CSV that replaces the original at the end
+    tmp_csv = args.csv + ".tmp"
+    csvfile = None
+
+    # tiktoken downloads the encoding on first use, so load it now rather than block the event loop later
+    if token_encoding(args.model) is None:
+        logger.warning(f"Could not load the tiktoken encoding for {args.model}; "
+                       f"capping job content at {4 * args.max_content_tokens} characters instead")
+
+    # One client for the whole run, keeping a connection alive for each concurrent request;
+    # created up front so a missing API key stops the run before anything is crawled
+    limits = httpx.Limits(max_connections=args.max_concurrency, max_keepalive_connections=args.max_concurrency)
     try:
-        jobs = fetch_cra_jobs(driver, logger)
+        openai_client = AsyncOpenAI(api_key=os.environ.get("OPENAI_API_KEY"),
+                                    http_client=DefaultAsyncHttpxClient(limits=limits))
+    except OpenAIError as e:
+        logger.error(f"Could not create the OpenAI client: {e}")
+        return
+
+    driver_pool = DriverPool(args.chromedriver, args.workers, args.selenium_hub, args.driver_max_uses)
+    try:
+        with driver_pool.acquire() as driver:
+            jobs = fetch_cra_jobs(driver, logger, existing_jobs, args.stop_after_seen)
         if len(jobs) == 0:
             logger.error(
                 "Crawling failed. No job listings found. Please try again later.")
@@ -370,77 +1194,54 @@ def main():
 
         logger.info(f"Found {len(jobs)} job listings on CRA website")
 
+        # Drop jobs already in the CSV, and repeated listings, before fetching any pages
+        new_jobs = {}
         for job in jobs:
-            crawl_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            title, link, location, job_type, full_content, posted_date, expiration_date, additional_links = extract_job_details(
-                driver, existing_jobs, job, args.additional_links, logger)
-            if title is None:
+            try:
+                card = parse_listing_card(job)
+            except Exception as e:
+                # Skip the malformed card rather than abort the crawl
+                logger.error(f"Error parsing job listing card: {e}")
                 continue
+            if card[1] in existing_jobs or card[1] in new_jobs:
+                logger.info(f"Skipping duplicate job: {card[0]}")
+            else:
+                new_jobs[card[1]] = card
+        logger.info(f"{len(new_jobs)} new job listings to scrape")
 
-            parsed_details = parse_job_details(
-                title, full_content, args.max_attempts, args.model, logger)
-
-            job_info = {
-                "Crawl Time": crawl_time,
-                "Company/University": parsed_details["university_name"],
-                "Department": parsed_details["department"],
-                "Position": parsed_details["position"],
-                "Job Type": job_type,
-                "Location": location,
-                "Number of Positions": parsed_details["positions_available"],
-                "Hiring Areas": ", ".join(parsed_details["hiring_areas"]),
-                "Submission Deadline": parsed_details["submission_deadline"],
-                "Number of Recommendation Letters": parsed_details["recommendation_letters"],
-                "Posted Date": posted_date,
-                "Expiration Date": expiration_date,
-                "CRA Link": link,
-                "Additional Comments": parsed_details["additional_comments"],
-                "Additional Links": "\n".join(additional_links),
-                "CRA ID": title
-            }
-
-            existing_jobs[title] = job_info
-            logger.info(f"Scraped job: {title}")
-
-        # Ensure all jobs have the same keys
-        all_keys = set().union(*(d.keys() for d in existing_jobs.values()))
-        for job in existing_jobs.values():
-            for key in all_keys:
-                if key not in job:
-                    job[key] = "N/A"
-
-        # Define the order of columns
-        ordered_fieldnames = [
-            "Company/University",
-            "Department",
-            "Position",
-            "Hiring Areas",
-            "Location",
-            "Number of Positions",
-            "Submission Deadline",
-            "Number of Recommendation Letters",
-            "Expiration Date",
-            "CRA Link",
-            "Crawl Time",
-            "Posted Date",
-            "Job Type",
-            "Additional Links",
-            "Additional Comments",
-            "CRA ID"
-        ]
-
-        # Ensure all keys are included, even if not in our predefined order
-        for key in all_keys:
-            if key not in ordered_fieldnames:
-                ordered_fieldnames.append(key)
-
-       # Write results to CSV
         logger.info(f"Writing results to {args.csv}")
-        with open(args.csv, 'w', newline='', encoding='utf-8') as csvfile:
-            writer = csv.DictWriter(csvfile, fieldnames=ordered_fieldnames)
-            writer.writeheader()
-            for job_info in existing_jobs.values():
-                writer.writerow(job_info)
+        csvfile, writer = open_csv_checkpoint(args.csv, tmp_csv, new_jobs.keys())
+
+        def write_job(crawl_time, details, parsed_details):
+            writer.writerow(build_job_info(crawl_time, details, parsed_details))
+            csvfile.flush()
+            logger.info(f"Scraped job: {details[0]}")
+
+        async def crawl(cache, page_cache):
+            # Jobs are parsed with OpenAI as soon as they are extracted, overlapping both stages
+            job_queue = asyncio.Queue(maxsize=16)
+
+            async def extract():
+                await extract_all_jobs(
+                    new_jobs.values(), page_cache, driver_pool, existing_jobs, args.additional_links, args.workers, job_queue, logger)
+                await job_queue.put(None)
+
+            async with openai_client:
+                parsing = asyncio.ensure_future(parse_queued_jobs(
+                    openai_client, job_queue, args.max_attempts, args.model, args.batch_size,
+                    args.max_content_tokens, args.max_concurrency, args.rpm, cache, write_job, logger))
+                extraction = asyncio.ensure_future(extract())
+                try:
+                    await asyncio.gather(parsing, extraction)
+                finally:
+                    # If either stage fails, stop the other rather than leave it blocked on the queue
+                    parsing.cancel()
+                    extraction.cancel()
+
+        page_cache_ttl = args.page_cache_ttl * 24 * 60 * 60
+        with shelve.open(args.llm_cache) as cache, \
+                closing(PageCache(args.page_cache, page_cache_ttl)) as page_cache:
+            asyncio.run(crawl(cache, page_cache))
 
         logger.info(
             f"Scraped {len(existing_jobs)} job listings. Results saved to {args.csv}")
@@ -449,7 +1250,11 @@ def main():
         logger.exception(f"An error occurred during execution: {e}")
 
     finally:
-        driver.quit()
+        if csvfile is not None:
+            # Keep whatever was written, even if the run was interrupted
+            csvfile.close()
+            os.replace(tmp_csv, args.csv)
+        driver_pool.quit()
         logger.info("CRA Job Crawler finished execution")
 
 
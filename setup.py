@@ -18,14 +18,19 @@ setup(
         "License :: OSI Approved :: MIT License",
         "Operating System :: OS Independent",
     ],
-    python_requires='>=3.7',
+    python_requires='>=3.8',
     install_requires=[
         "beautifulsoup4>=4.12.3",
-        "jsonschema>=4.23.0",
+        "fastjsonschema>=2.20.0",
+        "httpx>=0.27.0",
+        "lxml>=5.3.0",
         "openai>=1.42.0",
-        "requests>=2.32.3",
+        "orjson>=3.10.7",
         "selenium>=4.23.1",
+        "selectolax>=0.3.21",
+        "tiktoken>=0.7.0",
         "colorama>=0.4.6",
+        "aiolimiter>=1.1.0",
     ],
     entry_points={
         'console_scripts': [
@@ -0,0 +1,79 @@
+import csv
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cra_job_crawler import FAILED_COMMENT, load_existing_jobs, open_csv_checkpoint  # noqa: E402
+
+OLD_FIELDNAMES = ["CRA Link", "Position", "Additional Comments"]
+
+
+class TestCheckpoint(unittest.TestCase):
+    """Tests for loading an existing CSV and streaming a run's results into a temporary copy."""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.csv_path = os.path.join(self.tmpdir.name, "jobs.csv")
+        self.tmp_path = self.csv_path + ".tmp"
+        with open(self.csv_path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(OLD_FIELDNAMES)
+            writer.writerow(["https://cra.org/ads/1/", "Professor", "ok"])
+            writer.writerow(["https://cra.org/ads/2/", "N/A", FAILED_COMMENT])
+            writer.writerow(["https://cra.org/ads/3/", "N/A", FAILED_COMMENT])
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def read_rows(self, path):
+        with open(path, newline="", encoding="utf-8") as f:
+            return list(csv.DictReader(f))
+
+    def test_existing_jobs_exclude_failed_rows(self):
+        self.assertEqual(load_existing_jobs(self.csv_path), {"https://cra.org/ads/1/"})
+
+    def test_missing_csv(self):
+        self.assertEqual(load_existing_jobs(os.path.join(self.tmpdir.name, "missing.csv")), set())
+
+    def test_failed_rows_kept_unless_rescraped(self):
+        csvfile, _ = open_csv_checkpoint(self.csv_path, self.tmp_path, {"https://cra.org/ads/2/"})
+        csvfile.close()
+        rows = self.read_rows(self.tmp_path)
+        self.assertEqual([row["CRA Link"] for row in rows], ["https://cra.org/ads/1/", "https://cra.org/ads/3/"])
+        # Old columns are reordered to the current layout, and new ones filled with N/A
+        self.assertEqual(rows[0]["Position"], "Professor")
+        self.assertEqual(rows[0]["Department"], "N/A")
+
+    def test_rescraped_failed_link_replaced(self):
+        csvfile, writer = open_csv_checkpoint(self.csv_path, self.tmp_path, {"https://cra.org/ads/2/"})
+        writer.writerow({"CRA Link": "https://cra.org/ads/2/", "Position": "Lecturer", "Additional Comments": ""})
+        csvfile.close()
+        os.replace(self.tmp_path, self.csv_path)
+        rows = [row for row in self.read_rows(self.csv_path) if row["CRA Link"] == "https://cra.org/ads/2/"]
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0]["Position"], "Lecturer")
+        self.assertIn("https://cra.org/ads/2/", load_existing_jobs(self.csv_path))
+
+    def test_interrupted_run(self):
+        # A previous run died before moving its results into place
+        with open(self.tmp_path, "w", encoding="utf-8") as f:
+            f.write("partial,garbage\n")
+        with open(self.csv_path, encoding="utf-8") as f:
+            original = f.read()
+        csvfile, writer = open_csv_checkpoint(self.csv_path, self.tmp_path)
+        writer.writerow({"CRA Link": "https://cra.org/ads/4/"})
+        csvfile.flush()
+        # The original CSV is untouched until the run replaces it
+        with open(self.csv_path, encoding="utf-8") as f:
+            self.assertEqual(f.read(), original)
+        csvfile.close()
+        links = [row["CRA Link"] for row in self.read_rows(self.tmp_path)]
+        self.assertEqual(links, ["https://cra.org/ads/1/", "https://cra.org/ads/2/",
+                                 "https://cra.org/ads/3/", "https://cra.org/ads/4/"])
+
+
+if __name__ == "__main__":
+    unittest.main()
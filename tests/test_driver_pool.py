@@ -0,0 +1,106 @@
+import os
+import sys
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cra_job_crawler import DriverPool  # noqa: E402
+
+
+class StubDriver:
+    """Stand-in for a WebDriver that records whether it was quit."""
+
+    def __init__(self, fail_to_quit=False):
+        self.quit_called = False
+        self.fail_to_quit = fail_to_quit
+
+    def delete_all_cookies(self):
+        pass
+
+    def quit(self):
+        self.quit_called = True
+        if self.fail_to_quit:
+            raise RuntimeError("session already gone")
+
+
+class TestDriverPool(unittest.TestCase):
+    """Tests for starting, reusing and recycling pooled drivers."""
+
+    def setUp(self):
+        self.started = []
+
+        def setup_driver(chromedriver_path, selenium_hub=None):
+            driver = StubDriver()
+            self.started.append(driver)
+            return driver
+        patcher = mock.patch("cra_job_crawler.setup_driver", side_effect=setup_driver)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def use(self, pool):
+        with pool.acquire() as driver:
+            return driver
+
+    def test_driver_reused(self):
+        pool = DriverPool("chromedriver", 1)
+        drivers = [self.use(pool) for _ in range(3)]
+        self.assertEqual(len(self.started), 1)
+        self.assertTrue(all(driver is drivers[0] for driver in drivers))
+        self.assertFalse(drivers[0].quit_called)
+
+    def test_retired_after_max_uses(self):
+        pool = DriverPool("chromedriver", 1, max_uses=2)
+        drivers = [self.use(pool) for _ in range(5)]
+        self.assertEqual(len(self.started), 3)
+        self.assertIs(drivers[0], drivers[1])
+        self.assertIsNot(drivers[1], drivers[2])
+        self.assertTrue(drivers[0].quit_called)
+        self.assertTrue(drivers[2].quit_called)
+        self.assertFalse(drivers[4].quit_called)
+        self.assertEqual(pool.drivers, {drivers[4]})
+
+    def test_retired_when_body_raises(self):
+        pool = DriverPool("chromedriver", 1)
+        with self.assertRaises(ValueError):
+            with pool.acquire() as failed:
+                raise ValueError("page failed")
+        self.assertTrue(failed.quit_called)
+        self.assertIsNot(self.use(pool), failed)
+        self.assertEqual(len(self.started), 2)
+
+    def test_slots_always_returned(self):
+        pool = DriverPool("chromedriver", 2, max_uses=1)
+        for i in range(4):
+            try:
+                with pool.acquire():
+                    if i % 2:
+                        raise ValueError("page failed")
+            except ValueError:
+                pass
+        self.assertEqual(pool.available.qsize(), 2)
+        # Both slots can still be held at once
+        with pool.acquire(), pool.acquire():
+            self.assertEqual(pool.available.qsize(), 0)
+        self.assertEqual(pool.available.qsize(), 2)
+
+    def test_slot_returned_when_start_fails(self):
+        pool = DriverPool("chromedriver", 1)
+        with mock.patch("cra_job_crawler.setup_driver", side_effect=RuntimeError("no chrome")):
+            with self.assertRaises(RuntimeError):
+                self.use(pool)
+        self.assertEqual(pool.available.qsize(), 1)
+        self.assertIsNotNone(self.use(pool))
+
+    def test_quit_ignores_errors(self):
+        pool = DriverPool("chromedriver", 2)
+        with pool.acquire() as first, pool.acquire() as second:
+            first.fail_to_quit = True
+        pool.quit()
+        self.assertTrue(first.quit_called)
+        self.assertTrue(second.quit_called)
+        self.assertEqual(pool.drivers, set())
+
+
+if __name__ == "__main__":
+    unittest.main()
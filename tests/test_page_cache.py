@@ -0,0 +1,101 @@
+import asyncio
+import os
+import sys
+import unittest
+from unittest import mock
+
+import httpx
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cra_job_crawler import HTTP_RETRIES, PageCache, fetch_static  # noqa: E402
+
+PAGE = "<html><body><p>Hello</p></body></html>"
+
+
+class TestPageCache(unittest.TestCase):
+    """Tests for the TTL of cached pages."""
+
+    def test_fresh_entry(self):
+        cache = PageCache(":memory:", ttl=60)
+        cache.put("https://example.edu/", 200, PAGE)
+        self.assertEqual(cache.get("https://example.edu/"), (200, PAGE))
+        self.assertIsNone(cache.get("https://example.edu/other"))
+
+    def test_expired_entry(self):
+        cache = PageCache(":memory:", ttl=60)
+        with mock.patch("cra_job_crawler.time.time", return_value=1000):
+            cache.put("https://example.edu/", 200, PAGE)
+        with mock.patch("cra_job_crawler.time.time", return_value=1061):
+            self.assertIsNone(cache.get("https://example.edu/"))
+
+    def test_zero_ttl_always_refetches(self):
+        cache = PageCache(":memory:", ttl=0)
+        cache.put("https://example.edu/", 200, PAGE)
+        self.assertIsNone(cache.get("https://example.edu/"))
+
+
+class TestFetchStatic(unittest.TestCase):
+    """Tests for which fetch outcomes fetch_static caches."""
+
+    def setUp(self):
+        self.cache = PageCache(":memory:", ttl=60)
+        self.requests = []
+        # Retries back off with asyncio.sleep, which the tests skip
+        patcher = mock.patch("cra_job_crawler.asyncio.sleep", new=mock.AsyncMock())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def fetch(self, handler, url="https://example.edu/"):
+        def record(request):
+            self.requests.append(request)
+            return handler(request)
+
+        async def run():
+            async with httpx.AsyncClient(transport=httpx.MockTransport(record)) as client:
+                return await fetch_static(client, self.cache, url, timeout=10)
+        return asyncio.run(run())
+
+    def test_success_cached(self):
+        tree = self.fetch(lambda request: httpx.Response(200, html=PAGE))
+        self.assertEqual(tree.css_first("p").text(), "Hello")
+        self.assertEqual(self.cache.get("https://example.edu/"), (200, PAGE))
+        tree = self.fetch(lambda request: httpx.Response(500))
+        self.assertEqual(tree.css_first("p").text(), "Hello")
+        self.assertEqual(len(self.requests), 1)
+
+    def test_not_found_cached(self):
+        with self.assertRaises(httpx.HTTPError):
+            self.fetch(lambda request: httpx.Response(404))
+        self.assertEqual(self.cache.get("https://example.edu/"), (404, None))
+        with self.assertRaises(httpx.HTTPError):
+            self.fetch(lambda request: httpx.Response(200, html=PAGE))
+        self.assertEqual(len(self.requests), 1)
+
+    def test_non_html_cached(self):
+        with self.assertRaises(httpx.HTTPError):
+            self.fetch(lambda request: httpx.Response(
+                200, content=b"%PDF-1.4", headers={"content-type": "application/pdf"}))
+        self.assertEqual(self.cache.get("https://example.edu/"), (200, None))
+
+    def test_transient_failures_not_cached(self):
+        for status in (429, 503):
+            with self.subTest(status=status):
+                self.requests.clear()
+                with self.assertRaises(httpx.HTTPError):
+                    self.fetch(lambda request: httpx.Response(status))
+                self.assertEqual(len(self.requests), HTTP_RETRIES + 1)
+                self.assertIsNone(self.cache.get("https://example.edu/"))
+
+    def test_timeout_not_cached(self):
+        def timeout(request):
+            raise httpx.ReadTimeout("timed out", request=request)
+        with self.assertRaises(httpx.TimeoutException):
+            self.fetch(timeout)
+        self.assertIsNone(self.cache.get("https://example.edu/"))
+        tree = self.fetch(lambda request: httpx.Response(200, html=PAGE))
+        self.assertEqual(tree.css_first("p").text(), "Hello")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,71 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cra_job_crawler import ADDITIONAL_CONTENT_PREFIX, parse_date, quick_extract  # noqa: E402
+
+
+class TestQuickExtract(unittest.TestCase):
+    """Tests for the regex extraction of letters, positions and deadlines."""
+
+    def test_letters(self):
+        self.assertEqual(quick_extract("Three letters of recommendation"), {"recommendation_letters": "3"})
+        self.assertEqual(quick_extract("3 reference letters"), {"recommendation_letters": "3"})
+        self.assertEqual(quick_extract("the names of five referees"), {"recommendation_letters": "5"})
+
+    def test_positions(self):
+        self.assertEqual(quick_extract("We invite applications for two tenure-track positions."),
+                         {"positions_available": "2"})
+        self.assertEqual(quick_extract("3 faculty openings"), {"positions_available": "3"})
+
+    def test_numbers_inside_words_or_years(self):
+        self.assertEqual(quick_extract("Fall 2026 faculty positions"), {})
+        self.assertEqual(quick_extract("2025 tenure-track positions"), {})
+        self.assertEqual(quick_extract("Reviewers often letters"), {})
+        self.assertEqual(quick_extract("someone positions"), {})
+
+    def test_ranges_and_choices(self):
+        self.assertEqual(quick_extract("three to five letters"), {})
+        self.assertEqual(quick_extract("3-5 letters of reference"), {})
+        self.assertEqual(quick_extract("1 or 2 positions"), {})
+        self.assertEqual(quick_extract("one of the two positions"), {})
+        self.assertEqual(quick_extract("one of the positions"), {})
+
+    def test_durations(self):
+        self.assertEqual(quick_extract("5 years of teaching positions"), {})
+
+    def test_conflicting_counts(self):
+        self.assertEqual(quick_extract("two faculty positions ... 3 tenure-track positions"), {})
+        self.assertEqual(quick_extract("three letters ... Three reference letters"), {"recommendation_letters": "3"})
+
+    def test_additional_content_ignored(self):
+        details = ("We invite applications for tenure-track faculty.\n\n"
+                   f"{ADDITIONAL_CONTENT_PREFIX}https://cs.example.edu/:\n"
+                   "    The department is hiring 35 positions; three letters are required...")
+        self.assertEqual(quick_extract(details), {})
+
+    def test_deadline(self):
+        self.assertEqual(quick_extract("Application deadline: January 15th, 2025."),
+                         {"submission_deadline": "2025-01-15"})
+        self.assertEqual(quick_extract("The deadline is 2025-02-30"), {})
+
+
+class TestParseDate(unittest.TestCase):
+    """Tests for normalizing deadline dates."""
+
+    def test_formats(self):
+        self.assertEqual(parse_date("2025-01-15"), "2025-01-15")
+        self.assertEqual(parse_date("1/15/2025"), "2025-01-15")
+        self.assertEqual(parse_date("Jan. 15, 2025"), "2025-01-15")
+        self.assertEqual(parse_date("15 January 2025"), "2025-01-15")
+        self.assertEqual(parse_date("March 3rd, 2025"), "2025-03-03")
+
+    def test_invalid(self):
+        self.assertIsNone(parse_date("February 30, 2025"))
+        self.assertIsNone(parse_date("13/40/2025"))
+
+
+if __name__ == "__main__":
+    unittest.main()